@@ -1,6 +1,11 @@
+import math
 import numpy as np
 import scipy.constants
 
+try:
+    import numexpr as ne
+except ImportError:  # numexpr is optional
+    ne = None
 
 M = 0.0289644  # molar mass of air in kg/mol
 a = 0.0065  # K/m
@@ -12,20 +17,44 @@ g = scipy.constants.g
 
 # based on eq 3a from https://library.wmo.int/doc_num.php?explnum_id=7450
 def calculate_saturation_vapour_pressure(t_celsius: float) -> float:
-    e_w = 6.112 * np.exp(17.62 * t_celsius / (243.12 + t_celsius))
+    if isinstance(t_celsius, (int, float)):
+        # math.exp avoids the numpy overhead for single values
+        e_w = 6.112 * math.exp(17.62 * t_celsius / (243.12 + t_celsius))
+    else:
+        e_w = 6.112 * np.exp(17.62 * t_celsius / (243.12 + t_celsius))
     return e_w  # in units of hPa
 
 
 # based on eq 7.3 from https://www.dwd.de/DE/leistungen/pbfb_verlag_leitfaeden/
 # pdf_einzelbaende/leitfaden6_pdf.pdf?__blob=publicationFile&v=3
-def qff_from_qfe(
-    qfe: float, h: float, t_celsius: float, rh_percent: float
-) -> float:
-    T = 273.15 + t_celsius
+def get_reduction_factor(h: float, t_celsius: float, rh_percent: float):
     e_w = calculate_saturation_vapour_pressure(t_celsius)
+    if ne is not None and max(map(np.ndim, (h, t_celsius, rh_percent))) > 0:
+        # evaluate the remaining expression in a single pass over the data
+        return ne.evaluate(
+            "exp(h * g / R_L / "
+            "(273.15 + t_celsius + rh_percent / 100 * e_w * C_h + a * h / 2))",
+            local_dict={
+                "h": np.asarray(h, dtype=float),
+                "t_celsius": np.asarray(t_celsius, dtype=float),
+                "rh_percent": np.asarray(rh_percent, dtype=float),
+                "e_w": np.asarray(e_w, dtype=float),
+                "g": g,
+                "R_L": R_L,
+                "C_h": C_h,
+                "a": a,
+            },
+        )
+    T = 273.15 + t_celsius
     # Ignoring the pressure dependency of the vapour pressure for simplicity.
     e = rh_percent / 100 * e_w
-    qff = qfe * np.exp(h * g / R_L / (T + e * C_h + a * h / 2))
+    return np.exp(h * g / R_L / (T + e * C_h + a * h / 2))
+
+
+def qff_from_qfe(
+    qfe: float, h: float, t_celsius: float, rh_percent: float
+) -> float:
+    qff = qfe * get_reduction_factor(h, t_celsius, rh_percent)
     return qff  # in units of hPa
 
 
@@ -36,24 +65,33 @@ def qnh_from_qfe(qfe: float, h: float) -> float:
 def qfe_from_qff(
     qff: float, h: float, t_celsius: float, rh_percent: float
 ) -> float:
-    T = 273.15 + t_celsius
-    e_w = calculate_saturation_vapour_pressure(t_celsius)
-    # Ignoring the pressure dependency of the vapour pressure for simplicity.
-    e = rh_percent / 100 * e_w
-    qfe = qff / np.exp(h * g / R_L / (T + e * C_h + a * h / 2))
+    qfe = qff / get_reduction_factor(h, t_celsius, rh_percent)
     return qfe  # in units of hPa
 
 
 # calculate barometric altitude based on the following formula:
 # https://www.weather.gov/media/epz/wxcalc/pressureAltitude.pdf
 def calculate_pressure_altitude(pressure: float, p0: float = 101_325) -> float:
-    altitude = 0.3048 * 145_366.45 * (1 - pow(pressure / p0, 0.190_284))
+    # -expm1(x * log(q)) == 1 - q ** x without cancellation near p0
+    altitude = (
+        -0.3048 * 145_366.45 * np.expm1(0.190_284 * np.log(pressure / p0))
+    )
     return altitude
 
 
 # https://en.wikipedia.org/wiki/Theoretical_gravity
-def get_lat_gravity(latitude: float) -> float:
-    sin_lat_sq = np.sin(latitude * np.pi / 180.0) ** 2
+def _get_lat_gravity_scalar(latitude: float) -> float:
+    sin_lat_sq = math.sin(math.radians(latitude)) ** 2
+    g = (
+        9.7803253359
+        * (1 + 0.00193185265241 * sin_lat_sq)
+        / math.sqrt(1 - 0.00669437999013 * sin_lat_sq)
+    )
+    return g
+
+
+def _get_lat_gravity_array(latitude) -> np.ndarray:
+    sin_lat_sq = np.sin(np.deg2rad(latitude)) ** 2
     g = (
         9.7803253359
         * (1 + 0.00193185265241 * sin_lat_sq)
@@ -62,6 +100,12 @@ def get_lat_gravity(latitude: float) -> float:
     return g
 
 
+def get_lat_gravity(latitude: float) -> float:
+    if np.ndim(latitude) == 0:
+        return _get_lat_gravity_scalar(float(latitude))
+    return _get_lat_gravity_array(latitude)
+
+
 # based on https://www.amsys-sensor.com/downloads/notes/ms5611-precise-
 # altitude-measurement-with-a-pressure-sensor-module-amsys-509e.pdf and
 # http://dx.doi.org/10.1109/WPNC.2010.5650745
@@ -76,7 +120,7 @@ def get_barometric_altitude(
         _g = get_lat_gravity(latitude)
     else:
         _g = g
-    altitude = h0 + T0 / a * (1 - (p / p0) ** (R_L * a / _g))
+    altitude = h0 - T0 / a * np.expm1(R_L * a / _g * np.log(p / p0))
     return altitude
 
 
@@ -92,5 +136,5 @@ def get_altitude_pressure(
     else:
         _g = g
     dh = altitude - h0
-    p = p0 * (1 - a * dh / T0) ** (_g / (R_L * a))
+    p = p0 * np.exp(_g / (R_L * a) * np.log1p(-a * dh / T0))
     return p
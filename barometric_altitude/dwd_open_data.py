@@ -1,23 +1,51 @@
 import re
+import functools
 import requests
+from requests.adapters import HTTPAdapter
 from requests_cache import CachedSession
 import logging
 import io
+import os
+import tempfile
 import zipfile
+import pickle
+import time
+import threading
 import datetime as dt
+from pathlib import Path
 from operator import itemgetter
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import scipy.constants
-import arrow
+import numpy as np
 import pandas as pd
+from platformdirs import user_cache_dir
 from pydantic import constr
 from typing import Optional
 import sqlmodel
-import pygeodesy.ellipsoidalVincenty as eV
 from barometric_altitude.timeit import timeit
 import barometric_altitude as ba
 
 # logging.basicConfig(level="INFO")
 
+# Only the fixed columns of the station lists are matched by the regular
+# expression. Name and state are split afterwards, which avoids
+# backtracking over the variable length text.
+station_re = re.compile(
+    b"^(?P<station_id>[0-9]{5}) (?P<from>[0-9]{8}) (?P<until>[0-9]{8})"
+    b"[ \\t]+(?P<elevation>-?[0-9]{1,4})[ \\t]+(?P<lat>[45][0-9]\\.[0-9]{4})"
+    b"[ \\t]+(?P<lon>[1]?[0-9]\\.[0-9]{4})"
+    b"[ \\t]+(?P<station_info>[A-Z\\xc4-\\xdc][^\\r\\n]*\\S)",
+    re.ASCII | re.MULTILINE,
+)
+
+_cache_dir = Path(user_cache_dir("dwd_open_data"))
+_catalog_max_age = dt.timedelta(hours=8)
+# increase whenever the layout of the parsed catalogs changes
+_catalog_cache_version = 1
+_earth_radius = 6_371_008.8  # mean earth radius in m
+_max_connections = 8  # concurrent requests to the DWD server
+
 
 class dwd_stations(sqlmodel.SQLModel, table=True):
     station_id: int = sqlmodel.Field(primary_key=True)
@@ -61,28 +89,183 @@ def update_dwd_station(station):
             sql_session.commit()
 
 
+def _load_catalog_cache(catalog, fields):
+    cache_path = catalog._cache_path
+    try:
+        if cache_path.stat().st_mtime < (
+            time.time() - _catalog_max_age.total_seconds()
+        ):
+            return False
+        with cache_path.open("rb") as f:
+            cached = pickle.load(f)
+        if cached.get("version") != _catalog_cache_version:
+            return False
+        values = {field: cached[field] for field in fields}
+    except (OSError, pickle.PickleError, EOFError, KeyError) as e:
+        logging.info(f"catalog cache {cache_path} not usable: {e}")
+        return False
+    for field, value in values.items():
+        setattr(catalog, field, value)
+    return True
+
+
+def _save_catalog_cache(catalog, fields):
+    cache_path = catalog._cache_path
+    temp_path = None
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Other processes may read or write the cache at the same time. The
+        # catalog is written to a temporary file first, which then replaces
+        # the cache in a single step.
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=cache_path.parent, suffix=".tmp", delete=False
+        ) as f:
+            temp_path = f.name
+            pickle.dump(
+                {
+                    "version": _catalog_cache_version,
+                    **{_f: getattr(catalog, _f) for _f in fields},
+                },
+                f,
+            )
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logging.warning(f"failed to write catalog cache {cache_path}: {e}")
+        if temp_path is not None:
+            Path(temp_path).unlink(missing_ok=True)
+
+
+# Callers tend to look up the same few dates repeatedly and parsing strings
+# with pandas is comparatively slow. The results are immutable datetimes.
+@functools.lru_cache(maxsize=1024, typed=True)
+def parse_date(date) -> dt.datetime:
+    # Dates are handled as timezone-naive UTC. Integers are interpreted as
+    # seconds since epoch, anything else is parsed by pandas.
+    if isinstance(date, int):
+        return dt.datetime.utcfromtimestamp(date)
+    _date = pd.to_datetime(date)
+    if _date.tzinfo is not None:
+        _date = _date.tz_convert("UTC").tz_localize(None)
+    return _date.to_pydatetime()
+
+
+def get_utc_today() -> dt.datetime:
+    return dt.datetime.combine(
+        dt.datetime.now(dt.timezone.utc).date(), dt.time()
+    )
+
+
+def get_integer_day(date: dt.datetime) -> int:
+    # same as int(date.strftime("%Y%m%d")) without formatting a string
+    return date.year * 10_000 + date.month * 100 + date.day
+
+
+def _add_integer_dates(station: dict) -> dict:
+    # YYYYMMDD dates compare correctly as integers, which saves parsing them
+    # again for every station on each catalog lookup.
+    station["_from_i"] = int(station["from"])
+    station["_until_i"] = int(station["until"])
+    return station
+
+
+def _get_station_table(stations: list) -> tuple:
+    # YYYYMMDD dates compare correctly as integers. They are kept as arrays
+    # next to the station dicts, which are handed out to the callers, and
+    # the stations of a day are selected by vectorised comparisons. The
+    # coordinates are converted once for the distance calculations. The
+    # arrays are indexed like the list, so both are stored as one tuple.
+    columns = {
+        "from": np.array([int(_s["from"]) for _s in stations], np.int64),
+        "until": np.array([int(_s["until"]) for _s in stations], np.int64),
+        "lat": np.array([float(_s["lat"]) for _s in stations]),
+        "lon": np.array([float(_s["lon"]) for _s in stations]),
+    }
+    return stations, columns
+
+
+def _iter_groupdicts(pattern: re.Pattern, content: bytes):
+    # Matching bytes avoids decoding the whole response, only the matched
+    # fields are decoded. The groups are fetched as a tuple, so only the
+    # decoded dict is built per match. All capturing groups are named.
+    _names = sorted(pattern.groupindex, key=pattern.groupindex.get)
+    for _match in pattern.finditer(content):
+        yield dict(
+            zip(
+                _names,
+                [
+                    None if _value is None else _value.decode("latin-1")
+                    for _value in _match.groups()
+                ],
+            )
+        )
+
+
+def create_session(session_class, *args, **kwargs):
+    # All requests go to the same host. The pool has to hold one connection
+    # per concurrent request, otherwise connections get discarded and the
+    # TCP/TLS handshakes are paid again.
+    session = session_class(*args, **kwargs)
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=1, pool_maxsize=_max_connections),
+    )
+    return session
+
+
+def _iter_stations(pattern: re.Pattern, content: bytes):
+    for _station in _iter_groupdicts(pattern, content):
+        # The text columns are padded with at least two spaces. Names filling
+        # their column completely are followed by a single space only, then
+        # the state is taken as the last word.
+        _station_info = _station.pop("station_info")
+        _columns = _station_info.split("  ", 1)
+        if len(_columns) == 2:
+            _columns = [_columns[0], _columns[1].split()[0]]
+        else:
+            _columns = _station_info.rsplit(maxsplit=1)
+            if len(_columns) < 2:
+                continue
+        _station["station_name"], _station["state"] = _columns
+        yield _station
+
+
+def _fetch_responses(session, urls: dict):
+    # The catalog files are independent of each other, so they are
+    # requested concurrently over the pooled connections of the session.
+    with ThreadPoolExecutor(max_workers=_max_connections) as executor:
+        responses = dict(zip(urls, executor.map(session.get, urls.values())))
+    if any(_r.status_code != 200 for _r in responses.values()):
+        logging.warning("no valid response from server")
+        return None
+    return responses
+
+
 class HourlyCatalog:
-    def __init__(self, ssl_verify=True):
-        self.session = requests.Session()
-        self.session.verify = ssl_verify
+    _cached_fields = ("stations", "pressure", "temperature", "updated")
+
+    def __init__(self, ssl_verify=True, session=None):
+        if session is None:
+            session = create_session(requests.Session)
+            session.verify = ssl_verify
+        self.session = session
         self.url = (
             "https://opendata.dwd.de/climate_environment/CDC/"
             "observations_germany/climate/hourly/"
         )
-        self.station_re = re.compile(
-            "(?P<station_id>[0-9]{5}) (?P<from>[0-9]{8}) (?P<until>[0-9]{8})"
-            "\\s+(?P<elevation>-?[0-9]{1,4})\\s+(?P<lat>[45][0-9]\\.[0-9]{4})"
-            "\\s+(?P<lon>[1]?[0-9]\\.[0-9]{4})\\s+(?P<station_name>[A-ZÄ-Ü].*"
-            "\\S)\\s+(?P<state>[A-Z].*\\S)"
-        )
+        self.station_re = station_re
         self.pressure_re = re.compile(
-            "(?P<file_name>stundenwerte_P0_(?P<station_id>[0-9]{5})_"
-            "(?:akt|(?:[0-9]{8}_[0-9]{8}_hist)).zip)</a>"
+            b"(?P<file_name>stundenwerte_P0_(?P<station_id>[0-9]{5})_"
+            b"(?:akt|(?:[0-9]{8}_[0-9]{8}_hist)).zip)</a>",
+            re.ASCII,
         )
         self.temperature_re = re.compile(
-            "(?P<file_name>stundenwerte_TU_(?P<station_id>[0-9]{5})_"
-            "(?:akt|(?:[0-9]{8}_[0-9]{8}_hist)).zip)</a>"
+            b"(?P<file_name>stundenwerte_TU_(?P<station_id>[0-9]{5})_"
+            b"(?:akt|(?:[0-9]{8}_[0-9]{8}_hist)).zip)</a>",
+            re.ASCII,
         )
+        self._cache_path = _cache_dir / "hourly_catalog.pkl"
+        # reentrant, a download started by check_catalog publishes under it
+        self._lock = threading.RLock()
         self.updated = None
         self.stations = {"recent": None, "historical": None}
         self.pressure = {"recent": None, "historical": None}
@@ -90,99 +273,137 @@ class HourlyCatalog:
 
     @timeit
     def download_catalog(self):
+        urls = {}
         for category in ("historical", "recent"):
             _url = f"{self.url}pressure/{category}/"
-            stations_response = self.session.get(
+            urls[category, "stations"] = (
                 _url + "P0_Stundenwerte_Beschreibung_Stationen.txt"
             )
-            if not stations_response.status_code == 200:
-                logging.warning("no valid response from server")
-                return None
-            self.stations[category] = [
-                _x.groupdict()
-                for _x in self.station_re.finditer(stations_response.text)
-            ]
-            _url = f"{self.url}pressure/{category}/"
-            pressure_response = self.session.get(_url)
-            if not pressure_response.status_code == 200:
-                logging.warning("no valid response from server")
-                return None
-            self.pressure[category] = {
+            urls[category, "pressure"] = _url
+            urls[category, "temperature"] = (
+                f"{self.url}air_temperature/{category}/"
+            )
+        responses = _fetch_responses(self.session, urls)
+        if responses is None:
+            return None
+        # The new catalog is built separately and replaces the old one in a
+        # single step, so concurrent lookups never see a mix of both.
+        stations, pressure, temperature = {}, {}, {}
+        for category in ("historical", "recent"):
+            _url = urls[category, "pressure"]
+            _pressures = pressure[category] = {
                 _x["station_id"]: _url + _x["file_name"]
-                for _x in self.pressure_re.finditer(pressure_response.text)
+                for _x in _iter_groupdicts(
+                    self.pressure_re, responses[category, "pressure"].content
+                )
             }
-            _url = f"{self.url}air_temperature/{category}/"
-            temperature_response = self.session.get(_url)
-            if not temperature_response.status_code == 200:
-                logging.warning("no valid response from server")
-                return None
-            self.temperature[category] = {
+            _url = urls[category, "temperature"]
+            _temperatures = temperature[category] = {
                 _x["station_id"]: _url + _x["file_name"]
-                for _x in self.temperature_re.finditer(
-                    temperature_response.text
+                for _x in _iter_groupdicts(
+                    self.temperature_re,
+                    responses[category, "temperature"].content,
                 )
             }
-        self.updated = arrow.utcnow()
+            # Stations without both files can never be selected. They are
+            # dropped and the others joined with their files once here
+            # instead of on every lookup.
+            stations[category] = _get_station_table(
+                [
+                    {
+                        **_x,
+                        "pressure_file_name": _pressures[_x["station_id"]],
+                        "temperature_file_name": _temperatures[
+                            _x["station_id"]
+                        ],
+                    }
+                    for _x in _iter_stations(
+                        self.station_re,
+                        responses[category, "stations"].content,
+                    )
+                    if _x["station_id"] in _pressures
+                    and _x["station_id"] in _temperatures
+                ]
+            )
+        with self._lock:
+            self.stations = stations
+            self.pressure = pressure
+            self.temperature = temperature
+            self.updated = dt.datetime.now(dt.timezone.utc)
+            _save_catalog_cache(self, self._cached_fields)
 
     @timeit
     def check_catalog(self):
-        if self.updated is None:
-            self.download_catalog()
-        elif self.updated < arrow.utcnow().shift(hours=-8):
-            self.download_catalog()
-        return self.updated is not None
+        # Concurrent callers wait for a running download instead of
+        # starting their own.
+        with self._lock:
+            if self.updated is None:
+                _load_catalog_cache(self, self._cached_fields)
+            if self.updated is None:
+                self.download_catalog()
+            elif self.updated < (
+                dt.datetime.now(dt.timezone.utc) - _catalog_max_age
+            ):
+                self.download_catalog()
+            return self.updated is not None
 
     @timeit
     def get_catalog(self, date):
         if not self.check_catalog():
             return None
-        selected_date = arrow.get(date)
-        yesterday = arrow.utcnow().floor("day").shift(days=-1)
-        if selected_date < yesterday.shift(days=-500):
+        selected_date = parse_date(date)
+        selected_day = get_integer_day(selected_date)
+        yesterday = get_utc_today() - dt.timedelta(days=1)
+        if selected_date < yesterday - dt.timedelta(days=500):
             category = "historical"
         else:
             category = "recent"
-        _pressures = self.pressure[category]
-        _temperatures = self.temperature[category]
-        available_stations = [
-            {
-                **_station,
-                "pressure_file_name": _pressures[_station["station_id"]],
-                "temperature_file_name": _temperatures[_station["station_id"]],
-            }
-            for _station in self.stations[category]
-            if _station["station_id"] in _pressures
-            and _station["station_id"] in _temperatures
-            and arrow.get(_station["from"]) <= selected_date
-            and arrow.get(_station["until"]) >= selected_date.floor("day")
-        ]
-        return {"stations": available_stations, "category": category}
+        # one read, list and columns of the same download
+        _stations, _columns = self.stations[category]
+        _selected = np.flatnonzero(
+            (_columns["from"] <= selected_day)
+            & (_columns["until"] >= selected_day)
+        )
+        available_stations = [_stations[_i].copy() for _i in _selected]
+        return {
+            "stations": available_stations,
+            "category": category,
+            "lats": _columns["lat"][_selected],
+            "lons": _columns["lon"][_selected],
+        }
 
 
 class TenMinutesCatalog:
-    def __init__(self, ssl_verify=True):
-        self.session = requests.Session()
-        self.session.verify = ssl_verify
+    _cached_fields = ("metadata", "stations", "temperature", "updated")
+
+    def __init__(self, ssl_verify=True, session=None):
+        if session is None:
+            session = create_session(requests.Session)
+            session.verify = ssl_verify
+        self.session = session
         self.url = (
             "https://opendata.dwd.de/climate_environment/CDC/"
             "observations_germany/climate/10_minutes/air_temperature/"
         )
-        self.station_re = re.compile(
-            "(?P<station_id>[0-9]{5}) (?P<from>[0-9]{8}) (?P<until>[0-9]{8})"
-            "\\s+(?P<elevation>-?[0-9]{1,4})\\s+(?P<lat>[45][0-9]\\.[0-9]{4})"
-            "\\s+(?P<lon>[1]?[0-9]\\.[0-9]{4})\\s+(?P<station_name>[A-ZÄ-Ü].*"
-            "\\S)\\s+(?P<state>[A-Z].*\\S)"
-        )
+        self.station_re = station_re
         self.temperature_re = re.compile(
-            "(?P<file_name>10minutenwerte_TU_(?P<station_id>[0-9]{5})_"
-            "(?:now|akt|(?:(?P<from>[0-9]{8})_(?P<until>[0-9]{8})_hist)).zip)"
-            "</a>"
+            b"(?P<file_name>10minutenwerte_TU_(?P<station_id>[0-9]{5})_"
+            b"(?:now|akt|(?:(?P<from>[0-9]{8})_(?P<until>[0-9]{8})_hist)).zip)"
+            b"</a>",
+            re.ASCII,
         )
         self.metadata_re = re.compile(
-            "(?P<file_name>Meta_Daten_zehn_min_tu_(?P<station_id>[0-9]{5})"
-            ".zip)</a>"
+            b"(?P<file_name>Meta_Daten_zehn_min_tu_(?P<station_id>[0-9]{5})"
+            b".zip)</a>",
+            re.ASCII,
         )
+        self._cache_path = _cache_dir / "ten_minutes_catalog.pkl"
+        # reentrant, a download started by check_catalog publishes under it
+        self._lock = threading.RLock()
+        # historical temperature files of the recently selected days
+        self._historical_temperatures = OrderedDict()
         self.updated = None
+        self.metadata = None
         self.stations = {"recent": None, "historical": None, "now": None}
         self.temperature = {
             "recent": None,
@@ -192,216 +413,506 @@ class TenMinutesCatalog:
 
     @timeit
     def download_catalog(self):
-        _url = f"{self.url}meta_data/"
-        metadata_response = self.session.get(_url)
-        if not metadata_response.status_code == 200:
-            logging.warning("no valid response from server")
-            return None
-        self.metadata = {
-            _x["station_id"]: _url + _x["file_name"]
-            for _x in self.metadata_re.finditer(metadata_response.text)
-        }
         catalog_files = {
             "now": "zehn_now_tu_Beschreibung_Stationen.txt",
             "recent": "zehn_min_tu_Beschreibung_Stationen.txt",
             "historical": "zehn_min_tu_Beschreibung_Stationen.txt",
         }
+        urls = {"metadata": f"{self.url}meta_data/"}
         for _category, _file in catalog_files.items():
-            _url = f"{self.url}/{_category}/{_file}"
-            _response = self.session.get(_url)
-            if not _response.status_code == 200:
-                logging.warning("no valid response from server")
-                return None
-            self.stations[_category] = [
-                {
-                    **_x.groupdict(),
-                    "metadata_file_name": self.metadata[_x["station_id"]],
-                }
-                for _x in self.station_re.finditer(_response.text)
-            ]
-            _url = f"{self.url}{_category}/"
-            temperature_response = self.session.get(_url)
-            if not temperature_response.status_code == 200:
-                logging.warning("no valid response from server")
-                return None
+            urls[_category, "stations"] = f"{self.url}/{_category}/{_file}"
+            urls[_category, "temperature"] = f"{self.url}{_category}/"
+        responses = _fetch_responses(self.session, urls)
+        if responses is None:
+            return None
+        # The new catalog is built separately and replaces the old one in a
+        # single step, so concurrent lookups never see a mix of both.
+        stations, temperature = {}, {}
+        _url = urls["metadata"]
+        metadata = {
+            _x["station_id"]: _url + _x["file_name"]
+            for _x in _iter_groupdicts(
+                self.metadata_re, responses["metadata"].content
+            )
+        }
+        for _category in catalog_files:
+            _url = urls[_category, "temperature"]
+            temperature_response = responses[_category, "temperature"]
             if _category == "historical":
-                self.temperature[_category] = [
-                    _x
-                    for _x in self.temperature_re.finditer(
-                        temperature_response.text
+                temperature[_category] = [
+                    _add_integer_dates(
+                        {**_x, "file_name": _url + _x["file_name"]}
+                    )
+                    for _x in _iter_groupdicts(
+                        self.temperature_re, temperature_response.content
                     )
                 ]
+                _station_ids = {
+                    _x["station_id"] for _x in temperature[_category]
+                }
             else:
-                self.temperature[_category] = {
+                _station_ids = temperature[_category] = {
                     _x["station_id"]: _url + _x["file_name"]
-                    for _x in self.temperature_re.finditer(
-                        temperature_response.text
+                    for _x in _iter_groupdicts(
+                        self.temperature_re, temperature_response.content
                     )
                 }
-        self.updated = arrow.utcnow()
+            # stations without any temperature file can never be selected
+            stations[_category] = _get_station_table(
+                [
+                    {
+                        **_x,
+                        "metadata_file_name": metadata[_x["station_id"]],
+                    }
+                    for _x in _iter_stations(
+                        self.station_re,
+                        responses[_category, "stations"].content,
+                    )
+                    if _x["station_id"] in _station_ids
+                ]
+            )
+        with self._lock:
+            self.metadata = metadata
+            self.stations = stations
+            self.temperature = temperature
+            self._historical_temperatures.clear()
+            self.updated = dt.datetime.now(dt.timezone.utc)
+            _save_catalog_cache(self, self._cached_fields)
 
     @timeit
     def check_catalog(self):
-        if self.updated is None:
-            self.download_catalog()
-        elif self.updated < arrow.utcnow().shift(hours=-8):
-            self.download_catalog()
-        return self.updated is not None
+        # Concurrent callers wait for a running download instead of
+        # starting their own.
+        with self._lock:
+            if self.updated is None:
+                if _load_catalog_cache(self, self._cached_fields):
+                    self._historical_temperatures.clear()
+            if self.updated is None:
+                self.download_catalog()
+            elif self.updated < (
+                dt.datetime.now(dt.timezone.utc) - _catalog_max_age
+            ):
+                self.download_catalog()
+            return self.updated is not None
+
+    def _get_historical_temperatures(self, selected_day):
+        # The historical files covering a day only change with the catalog,
+        # the selection is reset whenever the catalog is replaced. Called
+        # with the lock held.
+        _temperatures = self._historical_temperatures.get(selected_day)
+        if _temperatures is None:
+            _temperatures = {
+                _x["station_id"]: _x["file_name"]
+                for _x in self.temperature["historical"]
+                if _x["_from_i"] <= selected_day <= _x["_until_i"]
+            }
+            self._historical_temperatures[selected_day] = _temperatures
+            if len(self._historical_temperatures) > 16:
+                # drop the least recently used day
+                self._historical_temperatures.popitem(last=False)
+        else:
+            self._historical_temperatures.move_to_end(selected_day)
+        return _temperatures
 
     @timeit
     def get_catalog(self, date):
         if not self.check_catalog():
             return None
-        selected_date = arrow.get(date)
-        today = arrow.utcnow().floor("day")
-        yesterday = today.shift(days=-1)
-        if selected_date < yesterday.shift(days=-500):
+        selected_date = parse_date(date)
+        selected_day = get_integer_day(selected_date)
+        today = get_utc_today()
+        yesterday = today - dt.timedelta(days=1)
+        if selected_date < yesterday - dt.timedelta(days=500):
             category = "historical"
-            _url = f"{self.url}{category}/"
-            _temperatures = {
-                _x["station_id"]: _url + _x["file_name"]
-                for _x in self.temperature[category]
-                if arrow.get(_x["from"]) <= selected_date
-                and arrow.get(_x["until"]) >= selected_date.floor("day")
-            }
         elif selected_date >= today:
             category = "now"
-            _temperatures = self.temperature[category]
         else:
             category = "recent"
-            _temperatures = self.temperature[category]
+        # Stations and files have to come from the same download.
+        with self._lock:
+            _stations, _columns = self.stations[category]
+            if category == "historical":
+                _temperatures = self._get_historical_temperatures(selected_day)
+            else:
+                _temperatures = self.temperature[category]
+        _mask = _columns["from"] <= selected_day
+        if category != "now":
+            _mask &= _columns["until"] >= selected_day
+        _selected = [
+            _i
+            for _i in np.flatnonzero(_mask)
+            if _stations[_i]["station_id"] in _temperatures
+        ]
         available_stations = [
             {
-                **_station,
-                "temperature_file_name": _temperatures[_station["station_id"]],
+                **_stations[_i],
+                "temperature_file_name": _temperatures[
+                    _stations[_i]["station_id"]
+                ],
             }
-            for _station in self.stations[category]
-            if _station["station_id"] in _temperatures
-            and arrow.get(_station["from"]) <= selected_date
-            and (
-                category == "now"
-                or arrow.get(_station["until"]) >= selected_date.floor("day")
-            )
+            for _i in _selected
         ]
-        return {"stations": available_stations, "category": category}
+        return {
+            "stations": available_stations,
+            "category": category,
+            "lats": _columns["lat"][_selected],
+            "lons": _columns["lon"][_selected],
+        }
 
 
 # You may disable SSL verification to circumvent problems.
 verify_ssl = True
-_hourly_catalog = HourlyCatalog(verify_ssl)
-_ten_minutes_catalog = TenMinutesCatalog(verify_ssl)
-_session = CachedSession("dwd_data", expire_after=dt.timedelta(hours=8))
+# The responses are cached next to the catalogs, independent of the working
+# directory.
+_session = create_session(
+    CachedSession,
+    _cache_dir / "dwd_data",
+    expire_after=dt.timedelta(hours=8),
+)
 _session.verify = verify_ssl
+# The catalogs share the cached session, so their listings are cached, too.
+_hourly_catalog = HourlyCatalog(session=_session)
+_ten_minutes_catalog = TenMinutesCatalog(session=_session)
 _engine = sqlmodel.create_engine("sqlite:///dwd_stations.sqlite")
 sqlmodel.SQLModel.metadata.create_all(_engine)
 
 
+# Columns used from the known product files and their types. Other
+# columns like STATIONS_ID or eor are not parsed at all. Missing values are
+# given as -999 and read as NaN.
+product_columns = {
+    "produkt_p0_stunde_": {
+        "MESS_DATUM": "int64",
+        "P": "float64",
+        "P0": "float64",
+    },
+    "produkt_tu_stunde_": {
+        "MESS_DATUM": "int64",
+        "TT_TU": "float64",
+        "RF_TU": "float64",
+    },
+    "produkt_zehn_min_tu_": {
+        "MESS_DATUM": "int64",
+        "QN": "int64",
+        "PP_10": "float64",
+        "TT_10": "float64",
+        "RF_10": "float64",
+    },
+    # same layout for the current data
+    "produkt_zehn_now_tu_": {
+        "MESS_DATUM": "int64",
+        "QN": "int64",
+        "PP_10": "float64",
+        "TT_10": "float64",
+        "RF_10": "float64",
+    },
+}
+
+
+def read_product_file(f, file_name: str):
+    for _prefix, _columns in product_columns.items():
+        if file_name.startswith(_prefix):
+            return pd.read_csv(
+                f,
+                delimiter=";",
+                skipinitialspace=True,
+                usecols=list(_columns),
+                dtype=_columns,
+                na_values={
+                    _column: [-999]
+                    for _column, _dtype in _columns.items()
+                    if _dtype == "float64"
+                },
+                engine="c",
+            )
+    df = pd.read_csv(f, delimiter=";", skipinitialspace=True, na_values=[-999])
+    return df.drop(columns=["STATIONS_ID", "eor"])
+
+
+def mess_datum_to_minutes(
+    mess_datum: np.ndarray, with_minutes: bool = False
+) -> np.ndarray:
+    # MESS_DATUM holds YYYYMMDDHH or YYYYMMDDHHMM integers in UTC. Splitting
+    # them arithmetically avoids formatting and parsing a string per row.
+    minute = 0
+    if with_minutes:
+        mess_datum, minute = np.divmod(mess_datum, 100)
+    mess_datum, hour = np.divmod(mess_datum, 100)
+    mess_datum, day = np.divmod(mess_datum, 100)
+    year, month = np.divmod(mess_datum, 100)
+    months = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    return (
+        months.astype("datetime64[m]").astype("int64")
+        + ((day - 1) * 24 + hour) * 60
+        + minute
+    )  # in minutes since epoch
+
+
+def read_elevation_history(f):
+    df = pd.read_csv(
+        f,
+        delimiter=";",
+        skipinitialspace=True,
+        parse_dates=["von_datum", "bis_datum"],
+        encoding="latin",
+    )
+    df.rename(
+        columns={
+            "Stations_id": "station_id",
+            "Stationsname": "station_name",
+            "Stationshoehe": "elevation",
+            "von_datum": "from",
+            "bis_datum": "until",
+            "Geogr.Breite": "lat",
+            "Geogr.Laenge": "lon",
+        },
+        inplace=True,
+    )
+    df["until"].replace(
+        {pd.NaT: dt.datetime.now().replace(microsecond=0)}, inplace=True
+    )
+    # computed once per archive for the date filters
+    df["until_plus1"] = df["until"] + pd.Timedelta(days=1)
+    return df
+
+
+def read_device_history(f):
+    df = pd.read_csv(
+        f,
+        delimiter=";",
+        skipinitialspace=True,
+        parse_dates=["Von_Datum", "Bis_Datum"],
+        encoding="latin",
+        usecols=[
+            "Stations_ID",
+            "Stationsname",
+            "Stationshoehe [m]",
+            "Geraetetyp Name",
+            "Von_Datum",
+            "Bis_Datum",
+            "Geo. Breite [Grad]",
+            "Geo. Laenge [Grad]",
+        ],
+    )
+    df.rename(
+        columns={
+            "Stations_ID": "station_id",
+            "Stationsname": "station_name",
+            "Stationshoehe [m]": "elevation",
+            "Geraetetyp Name": "device_name",
+            "Von_Datum": "from",
+            "Bis_Datum": "until",
+            "Geo. Breite [Grad]": "lat",
+            "Geo. Laenge [Grad]": "lon",
+        },
+        inplace=True,
+    )
+    df.dropna(subset=["elevation", "device_name"], inplace=True)
+    # computed once per archive for the date filters
+    df["until_plus1"] = df["until"] + pd.Timedelta(days=1)
+    return df
+
+
 @timeit
 def unpack_zipped_data(my_file, file_name_prefix: str):
-    my_zipfile = zipfile.ZipFile(my_file, "r")
     response = {}
-    for file_name in my_zipfile.namelist():
-        if not file_name.endswith(".txt"):
-            continue
-        elif file_name.startswith(file_name_prefix):
-            with my_zipfile.open(file_name) as f:
-                df = pd.read_csv(f, delimiter=";", skipinitialspace=True)
-            df.drop(columns=["STATIONS_ID", "eor"], inplace=True)
-            response["data"] = df
-        elif file_name.startswith("Metadaten_Geographie_"):
-            with my_zipfile.open(file_name) as f:
-                df = pd.read_csv(
-                    f,
-                    delimiter=";",
-                    skipinitialspace=True,
-                    parse_dates=["von_datum", "bis_datum"],
-                    encoding="latin",
-                )
-            df.rename(
-                columns={
-                    "Stations_id": "station_id",
-                    "Stationsname": "station_name",
-                    "Stationshoehe": "elevation",
-                    "von_datum": "from",
-                    "bis_datum": "until",
-                    "Geogr.Breite": "lat",
-                    "Geogr.Laenge": "lon",
-                },
-                inplace=True,
-            )
-            df["until"].replace(
-                {pd.NaT: dt.datetime.now().replace(microsecond=0)}, inplace=True
-            )
-            response["elevation_history"] = df
-        elif file_name.startswith("Metadaten_Geraete_Luftdruck_"):
-            with my_zipfile.open(file_name) as f:
-                df = pd.read_csv(
-                    f,
-                    delimiter=";",
-                    skipinitialspace=True,
-                    parse_dates=["Von_Datum", "Bis_Datum"],
-                    encoding="latin",
-                    usecols=[
-                        "Stations_ID",
-                        "Stationsname",
-                        "Stationshoehe [m]",
-                        "Geraetetyp Name",
-                        "Von_Datum",
-                        "Bis_Datum",
-                        "Geo. Breite [Grad]",
-                        "Geo. Laenge [Grad]",
-                    ],
-                )
-            df.rename(
-                columns={
-                    "Stations_ID": "station_id",
-                    "Stationsname": "station_name",
-                    "Stationshoehe [m]": "elevation",
-                    "Geraetetyp Name": "device_name",
-                    "Von_Datum": "from",
-                    "Bis_Datum": "until",
-                    "Geo. Breite [Grad]": "lat",
-                    "Geo. Laenge [Grad]": "lon",
-                },
-                inplace=True,
+    # Each prefix matches at most one file, stop once all were found.
+    wanted = {
+        file_name_prefix: "data",
+        "Metadaten_Geographie_": "elevation_history",
+        "Metadaten_Geraete_Luftdruck_": "device_history",
+    }
+    with zipfile.ZipFile(my_file, "r") as my_zipfile:
+        for zip_info in my_zipfile.infolist():
+            file_name = zip_info.filename
+            if not file_name.endswith(".txt"):
+                continue
+            prefix = next(
+                (_p for _p in wanted if file_name.startswith(_p)), None
             )
-            df.dropna(subset=["elevation", "device_name"], inplace=True)
-            response["device_history"] = df
+            if prefix is None:
+                continue
+            key = wanted.pop(prefix)
+            with my_zipfile.open(zip_info) as f:
+                if key == "data":
+                    response[key] = read_product_file(f, file_name)
+                elif key == "elevation_history":
+                    response[key] = read_elevation_history(f)
+                else:
+                    response[key] = read_device_history(f)
+            if not wanted:
+                break
     return response
 
 
-@timeit
-def unpack_zipped_data_from_url(url: str, file_name_prefix: str):
+def get_expire_after(url: str) -> dt.timedelta:
     if "now" in url:
         # This data seems to be refreshed every 30 minutes on the server.
         # We should not wait 8 hours for fresh data.
-        response = _session.get(url, expire_after=dt.timedelta(minutes=10))
-    else:
-        response = _session.get(url)
+        return dt.timedelta(minutes=10)
+    if url.endswith("_hist.zip"):
+        # Historical archives are named after the period they cover, an
+        # updated archive gets a new name.
+        return dt.timedelta(days=30)
+    return dt.timedelta(hours=8)
+
+
+# Parsing the archives is more expensive than reading them from the HTTP
+# cache. The parsed results are kept in memory until the expiry slot
+# changes. The slots are aligned to the epoch, not to the time the response
+# was cached, so a result may be parsed from a response that is about to
+# expire and then be kept for another slot. Data may thus be up to twice
+# the expiry period old.
+@functools.lru_cache(maxsize=32)
+def _unpack_zipped_data_from_url_cached(
+    url: str, file_name_prefix: str, expiry_slot: int
+):
+    response = _session.get(url, expire_after=get_expire_after(url))
     if not response.status_code == 200:
+        # raising prevents the failed download from being cached
+        raise requests.HTTPError(response=response)
+    # The central directory sits at the end of a zip file, so the archive
+    # cannot be parsed while it is being downloaded, and requests_cache
+    # holds the full body anyway. BytesIO shares the bytes object instead
+    # of copying it and the members are decompressed in a streaming
+    # fashion while pandas parses them.
+    return unpack_zipped_data(io.BytesIO(response.content), file_name_prefix)
+
+
+def _unpack_zipped_data_from_url(url: str, file_name_prefix: str):
+    # The returned DataFrames are shared with the cache and must not be
+    # modified by the caller.
+    expiry_slot = int(time.time() // get_expire_after(url).total_seconds())
+    try:
+        result = _unpack_zipped_data_from_url_cached(
+            url, file_name_prefix, expiry_slot
+        )
+    except requests.HTTPError:
         logging.warning("no data downloaded.")
         return None
-    return unpack_zipped_data(io.BytesIO(response.content), file_name_prefix)
+    logging.debug(
+        "unpacked data cache: %s",
+        _unpack_zipped_data_from_url_cached.cache_info(),
+    )
+    return result
+
+
+@timeit
+def unpack_zipped_data_from_url(url: str, file_name_prefix: str):
+    result = _unpack_zipped_data_from_url(url, file_name_prefix)
+    if result is None:
+        return None
+    # hand out copies to keep the cached DataFrames unchanged
+    return {_key: _df.copy() for _key, _df in result.items()}
+
+
+def haversine_distance(lat, lon, lats, lons):
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    h = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * _earth_radius * np.arcsin(np.sqrt(h))
+
+
+def sort_stations_by_distance(
+    stations: list,
+    lat: float,
+    lon: float,
+    refine: int = 10,
+    top_n: int = None,
+    lats: np.ndarray = None,
+    lons: np.ndarray = None,
+):
+    if len(stations) == 0:
+        return []
+    # With top_n, the stations are pre-selected by a vectorised spherical
+    # distance. The spherical error is well below 0.5%, the refine extra
+    # candidates make sure the nearest stations are not lost by it. All
+    # returned distances are ellipsoidal.
+    if lats is None or lons is None:
+        # numpy converts the coordinate strings of all stations in one call
+        lats, lons = np.array(
+            list(map(itemgetter("lat", "lon"), stations)), dtype=float
+        ).T
+    if top_n is None:
+        candidates = range(len(stations))
+    else:
+        distances = haversine_distance(float(lat), float(lon), lats, lons)
+        candidates = np.argsort(distances, kind="stable")[: top_n + refine]
+    # Importing pygeodesy is slow and only needed here. The first call pays
+    # for the import, later calls find the module in sys.modules.
+    import pygeodesy.ellipsoidalKarney as eK
+
+    distance_to = eK.LatLon(lat, lon).distanceTo
+    LatLon = eK.LatLon
+    for _index in candidates:
+        # the coordinates are already converted to floats above
+        _distance = distance_to(LatLon(lats[_index], lons[_index]))
+        stations[_index]["distance"] = round(_distance)
+    nearest = sorted(
+        (stations[_index] for _index in candidates),
+        key=itemgetter("distance"),
+    )
+    return nearest[:top_n]
+
+
+def select_time_range(df: pd.DataFrame, start, stop) -> pd.DataFrame:
+    # Returns the rows with start <= index < stop. The data files are
+    # ordered by time, so the range is found by binary search and sliced
+    # instead of comparing every row.
+    index = df.index
+    if not index.is_monotonic_increasing:
+        return df.loc[(index >= start) & (index < stop)]
+    return df.iloc[index.searchsorted(start) : index.searchsorted(stop)]
+
+
+def stations_to_dataframe(stations: list) -> pd.DataFrame:
+    # one column per field instead of one dict per station
+    df = pd.DataFrame.from_records(stations)
+    if len(df) == 0:
+        return df
+    df = df.astype({"lat": "float64", "lon": "float64", "elevation": "int64"})
+    if "distance" in df:
+        df["distance"] = df["distance"].astype("int64")
+    return df
+
+
+def dataframe_to_dict(df: pd.DataFrame, orient: str = "records"):
+    if orient == "columnar":
+        # one list per column instead of one dict per row
+        data = {_column: df[_column].tolist() for _column in df.columns}
+        data["index"] = df.index.astype("int64").tolist()
+        return data
+    return df.to_dict("records")
 
 
 @timeit
-def get_hourly_stations(date, lat: float = None, lon: float = None):
-    stations = []
+def get_hourly_stations(
+    date,
+    lat: float = None,
+    lon: float = None,
+    as_dataframe: bool = False,
+    top_n: int = None,
+):
     catalog = _hourly_catalog.get_catalog(date)
     if catalog is None:
         return []
     response = {"category": catalog["category"]}
     if None in (lat, lon):
-        response["stations"] = catalog["stations"]
+        response["stations"] = catalog["stations"][:top_n]
     else:
-        selected_location = eV.LatLon(lat, lon)
-        for _station in catalog["stations"]:
-            _station_location = eV.LatLon(_station["lat"], _station["lon"])
-            _distance = selected_location.distanceTo(_station_location)
-            _station["distance"] = round(_distance)
-            stations.append(_station)
-        sorted_stations = sorted(stations, key=itemgetter("distance"))
-        response["stations"] = sorted_stations
+        response["stations"] = sort_stations_by_distance(
+            catalog["stations"],
+            lat,
+            lon,
+            top_n=top_n,
+            lats=catalog["lats"],
+            lons=catalog["lons"],
+        )
+    if as_dataframe:
+        response["stations"] = stations_to_dataframe(response["stations"])
     return response
 
 
@@ -412,32 +923,41 @@ def get_hourly_data(
     date,
     as_dataframe: bool = False,
     bounds_minutes: float = None,
+    orient: constr(regex=r"^(records|columnar)$") = "records",
 ):
-    pressure_data = unpack_zipped_data_from_url(
-        station["pressure_file_name"], "produkt_"
-    )
-    temperature_data = unpack_zipped_data_from_url(
-        station["temperature_file_name"], "produkt_"
-    )
+    # both downloads are independent, so they are fetched concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        _pressure = executor.submit(
+            _unpack_zipped_data_from_url,
+            station["pressure_file_name"],
+            "produkt_",
+        )
+        _temperature = executor.submit(
+            _unpack_zipped_data_from_url,
+            station["temperature_file_name"],
+            "produkt_",
+        )
+        pressure_data = _pressure.result()
+        temperature_data = _temperature.result()
+    # The downloaded data is shared with the cache, so it is only
+    # transformed by operations returning new objects.
     combined_data = pd.merge(
         pressure_data["data"], temperature_data["data"], on="MESS_DATUM"
     )
-    combined_data.MESS_DATUM = pd.to_datetime(
-        combined_data.MESS_DATUM, format="%Y%m%d%H"
-    ) - dt.timedelta(minutes=10)
-    combined_data["utc"] = (
-        (combined_data.MESS_DATUM - dt.datetime(1970, 1, 1))
-        .dt.total_seconds()
-        .astype(int)
+    # MESS_DATUM is given in UTC, the timezone-naive timestamps are
+    # converted to seconds since epoch without any offset.
+    minutes = mess_datum_to_minutes(combined_data.MESS_DATUM.values) - 10
+    combined_data = combined_data.assign(
+        MESS_DATUM=minutes.astype("datetime64[m]").astype("datetime64[ns]"),
+        utc=minutes * 60,
     )
-    if isinstance(date, int):
-        _date = dt.datetime.utcfromtimestamp(date)
-    else:
-        _date = pd.to_datetime(date)
+    # same interpretation of the date as for the station selection
+    _date = parse_date(date)
+    _date64 = np.datetime64(_date)
     device_history = pressure_data.get("device_history")
     if device_history is not None:
-        _mask = (device_history["until"] + pd.Timedelta(days=1) > _date) & (
-            device_history["from"] <= _date
+        _mask = (device_history["until_plus1"].values > _date64) & (
+            device_history["from"].values <= _date64
         )
         device_history = device_history.loc[_mask]
         if len(device_history) > 1:
@@ -446,73 +966,66 @@ def get_hourly_data(
                 device_history["device_name"] != "Stationsbarometer"
             ]
     elevation_history = pressure_data["elevation_history"]
-    _mask = (elevation_history["until"] + pd.Timedelta(days=1) > _date) & (
-        elevation_history["from"] <= _date
+    _mask = (elevation_history["until_plus1"].values > _date64) & (
+        elevation_history["from"].values <= _date64
     )
     elevation_history = elevation_history.loc[_mask]
     if device_history is None or len(device_history) == 0:
         _device = elevation_history.iloc[0]
     else:
         _device = device_history.iloc[0]
-    combined_data.rename(
-        columns={
-            "P": "pressure",
-            "P0": "station_pressure",
-            "TT_TU": "temperature",
-            "RF_TU": "humidity",
-        },
-        inplace=True,
-    )
-    combined_data.set_index("MESS_DATUM", inplace=True)
-    combined_data.drop(columns=["QN_8", "QN_9"], inplace=True)
     # remove rows with invalid/empty data points
-    _columns = ["station_pressure", "pressure", "temperature", "humidity"]
-    combined_data.loc[:, _columns] = combined_data.loc[:, _columns].replace(
-        -999, float("NaN")
-    )
-    combined_data.dropna(
-        subset=["station_pressure", "temperature", "humidity"], inplace=True
+    combined_data = (
+        combined_data.rename(
+            columns={
+                "P": "pressure",
+                "P0": "station_pressure",
+                "TT_TU": "temperature",
+                "RF_TU": "humidity",
+            }
+        )
+        .set_index("MESS_DATUM")
+        .dropna(subset=["station_pressure", "temperature", "humidity"])
     )
     if bounds_minutes is not None:
         # limit output to the given bounds
         _bounds = dt.timedelta(minutes=bounds_minutes)
         _start = _date - _bounds
         _stop = _date + _bounds
-        _mask = (combined_data.index >= _start) & (combined_data.index < _stop)
     else:
         # limit output to data from the same device
-        _mask = (combined_data.index >= _device["from"]) & (
-            combined_data.index < _device["until"] + pd.Timedelta(days=1)
-        )
-    combined_data = combined_data.loc[_mask]
-    _device = _device.to_dict()
+        _start = _device["from"]
+        _stop = _device["until_plus1"]
+    combined_data = select_time_range(combined_data, _start, _stop)
+    _device = _device.drop("until_plus1").to_dict()
     _device["from"] = _device["from"].strftime("%Y%m%d")  #
     _device["until"] = _device["until"].strftime("%Y%m%d")
     station.update(_device)
-    if combined_data.pressure.max() > -999:
+    if combined_data.pressure.notna().any():
         geopotential_elevation = (
             station["elevation"]
             * ba.get_lat_gravity(station["lat"])
             / scipy.constants.g
         )
-        combined_data["qfe"] = ba.qfe_from_qff(
-            qff=combined_data["pressure"],
-            h=geopotential_elevation,
-            t_celsius=combined_data["temperature"],
-            rh_percent=combined_data["humidity"],
+        combined_data = combined_data.assign(
+            qfe=ba.qfe_from_qff(
+                qff=combined_data["pressure"],
+                h=geopotential_elevation,
+                t_celsius=combined_data["temperature"],
+                rh_percent=combined_data["humidity"],
+            ).round(2)
         )
-        combined_data.qfe = combined_data.qfe.round(2)
         station["pressure_offset"] = (
             (combined_data.qfe - combined_data.station_pressure)
             .median()
             .round(2)
         )
     else:
-        combined_data.drop(columns=["pressure"], inplace=True)
+        combined_data = combined_data.drop(columns=["pressure"])
     if as_dataframe:
         data = combined_data
     else:
-        data = combined_data.to_dict("records")
+        data = dataframe_to_dict(combined_data, orient)
     update_dwd_station(station)
     return {
         "station": station,
@@ -528,6 +1041,7 @@ def get_nearest_hourly_data(
     lon: float,
     as_dataframe: bool = False,
     bounds_minutes: float = None,
+    orient: constr(regex=r"^(records|columnar)$") = "records",
 ):
     """
     Lookup pressure, temperature (and humidity) data from the DWD Open Data
@@ -540,37 +1054,48 @@ def get_nearest_hourly_data(
     :param as_dataframe: Return results as pandas.DataFrame? Defaults to False.
     :param bounds_minutes: Provide range around target date in minutes.
     Defaults to None.
+    :param orient: Layout of the data if not returned as pandas.DataFrame.
+    "records" returns a list with one dict per row, "columnar" a dict with one
+    list per column and the timestamps in ns as "index". Defaults to
+    "records".
     :return: dict
     """
-    hourly_stations = get_hourly_stations(date, lat, lon)
+    hourly_stations = get_hourly_stations(date, lat, lon, top_n=1)
     if len(hourly_stations) == 0:
         logging.warning("no suitable stations found.")
         return None
     station = hourly_stations["stations"][0]
     category = hourly_stations["category"]
     return get_hourly_data(
-        station, category, date, as_dataframe, bounds_minutes
+        station, category, date, as_dataframe, bounds_minutes, orient
     )
 
 
 @timeit
-def get_ten_minutes_stations(date, lat: float = None, lon: float = None):
-    stations = []
+def get_ten_minutes_stations(
+    date,
+    lat: float = None,
+    lon: float = None,
+    as_dataframe: bool = False,
+    top_n: int = None,
+):
     catalog = _ten_minutes_catalog.get_catalog(date)
     if catalog is None:
         return []
     response = {"category": catalog["category"]}
     if None in (lat, lon):
-        response["stations"] = catalog["stations"]
+        response["stations"] = catalog["stations"][:top_n]
     else:
-        selected_location = eV.LatLon(lat, lon)
-        for _station in catalog["stations"]:
-            _station_location = eV.LatLon(_station["lat"], _station["lon"])
-            _distance = selected_location.distanceTo(_station_location)
-            _station["distance"] = round(_distance)
-            stations.append(_station)
-        sorted_stations = sorted(stations, key=itemgetter("distance"))
-        response["stations"] = sorted_stations
+        response["stations"] = sort_stations_by_distance(
+            catalog["stations"],
+            lat,
+            lon,
+            top_n=top_n,
+            lats=catalog["lats"],
+            lons=catalog["lons"],
+        )
+    if as_dataframe:
+        response["stations"] = stations_to_dataframe(response["stations"])
     return response
 
 
@@ -581,30 +1106,39 @@ def get_ten_minutes_data(
     date,
     as_dataframe: bool = False,
     bounds_minutes: float = None,
+    orient: constr(regex=r"^(records|columnar)$") = "records",
 ):
-    metadata = unpack_zipped_data_from_url(
-        station["metadata_file_name"], "produkt_"
-    )
-    temperature_data = unpack_zipped_data_from_url(
-        station["temperature_file_name"], "produkt_"
-    )
+    # both downloads are independent, so they are fetched concurrently
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        _metadata = executor.submit(
+            _unpack_zipped_data_from_url,
+            station["metadata_file_name"],
+            "produkt_",
+        )
+        _temperature = executor.submit(
+            _unpack_zipped_data_from_url,
+            station["temperature_file_name"],
+            "produkt_",
+        )
+        metadata = _metadata.result()
+        temperature_data = _temperature.result()
+    # The downloaded data is shared with the cache, so it is only
+    # transformed by operations returning new objects.
     combined_data = temperature_data["data"]
-    combined_data.MESS_DATUM = pd.to_datetime(
-        combined_data.MESS_DATUM, format="%Y%m%d%H%M"
+    # MESS_DATUM is given in UTC, the timezone-naive timestamps are
+    # converted to seconds since epoch without any offset.
+    minutes = mess_datum_to_minutes(combined_data.MESS_DATUM.values, True)
+    combined_data = combined_data.assign(
+        MESS_DATUM=minutes.astype("datetime64[m]").astype("datetime64[ns]"),
+        utc=minutes * 60,
     )
-    combined_data["utc"] = (
-        (combined_data.MESS_DATUM - dt.datetime(1970, 1, 1))
-        .dt.total_seconds()
-        .astype(int)
-    )
-    if isinstance(date, int):
-        _date = dt.datetime.utcfromtimestamp(date)
-    else:
-        _date = pd.to_datetime(date)
+    # same interpretation of the date as for the station selection
+    _date = parse_date(date)
+    _date64 = np.datetime64(_date)
     device_history = metadata.get("device_history")
     if device_history is not None:
-        _mask = (device_history["until"] + pd.Timedelta(days=1) > _date) & (
-            device_history["from"] <= _date
+        _mask = (device_history["until_plus1"].values > _date64) & (
+            device_history["from"].values <= _date64
         )
         device_history = device_history.loc[_mask]
         if len(device_history) > 1:
@@ -613,51 +1147,46 @@ def get_ten_minutes_data(
                 device_history["device_name"] != "Stationsbarometer"
             ]
     elevation_history = metadata["elevation_history"]
-    _mask = (elevation_history["until"] + pd.Timedelta(days=1) > _date) & (
-        elevation_history["from"] <= _date
+    _mask = (elevation_history["until_plus1"].values > _date64) & (
+        elevation_history["from"].values <= _date64
     )
     elevation_history = elevation_history.loc[_mask]
     if device_history is None or len(device_history) == 0:
         _device = elevation_history.iloc[0]
     else:
         _device = device_history.iloc[0]
-    combined_data.rename(
-        columns={
-            "QN": "quality",
-            "PP_10": "station_pressure",
-            "TT_10": "temperature",
-            "RF_10": "humidity",
-        },
-        inplace=True,
-    )
-    combined_data.set_index("MESS_DATUM", inplace=True)
-    combined_data.drop(columns=["TM5_10", "TD_10"], inplace=True)
     # remove rows with invalid/empty data points
     _columns = ["station_pressure", "temperature", "humidity"]
-    combined_data.loc[:, _columns] = combined_data.loc[:, _columns].replace(
-        -999, float("NaN")
+    combined_data = (
+        combined_data.rename(
+            columns={
+                "QN": "quality",
+                "PP_10": "station_pressure",
+                "TT_10": "temperature",
+                "RF_10": "humidity",
+            }
+        )
+        .set_index("MESS_DATUM")
+        .dropna(subset=_columns)
     )
-    combined_data.dropna(subset=_columns, inplace=True)
     if bounds_minutes is not None:
         # limit output to the given bounds
         _bounds = dt.timedelta(minutes=bounds_minutes)
         _start = _date - _bounds
         _stop = _date + _bounds
-        _mask = (combined_data.index >= _start) & (combined_data.index < _stop)
     else:
         # limit output to data from the same device
-        _mask = (combined_data.index >= _device["from"]) & (
-            combined_data.index < _device["until"] + pd.Timedelta(days=1)
-        )
-    combined_data = combined_data.loc[_mask]
-    _device = _device.to_dict()
+        _start = _device["from"]
+        _stop = _device["until_plus1"]
+    combined_data = select_time_range(combined_data, _start, _stop)
+    _device = _device.drop("until_plus1").to_dict()
     _device["from"] = _device["from"].strftime("%Y%m%d")  #
     _device["until"] = _device["until"].strftime("%Y%m%d")
     station.update(_device)
     _result = get_dwd_station(station)
     if _result is not None:
-        combined_data["qfe"] = (
-            combined_data.station_pressure + _result.pressure_offset
+        combined_data = combined_data.assign(
+            qfe=combined_data.station_pressure + _result.pressure_offset
         )
     else:
         _hourly = get_nearest_hourly_data(
@@ -667,13 +1196,13 @@ def get_ten_minutes_data(
             int(_hourly["station_id"]) == station["station_id"]
             and _hourly.get("pressure_offset") is not None
         ):
-            combined_data["qfe"] = (
-                combined_data.station_pressure + _hourly["pressure_offset"]
+            combined_data = combined_data.assign(
+                qfe=combined_data.station_pressure + _hourly["pressure_offset"]
             )
     if as_dataframe:
         data = combined_data
     else:
-        data = combined_data.to_dict("records")
+        data = dataframe_to_dict(combined_data, orient)
     return {
         "station": station,
         "category": category,
@@ -688,6 +1217,7 @@ def get_nearest_ten_minutes_data(
     lon: float,
     as_dataframe: bool = False,
     bounds_minutes: float = None,
+    orient: constr(regex=r"^(records|columnar)$") = "records",
 ):
     """
     Lookup pressure, temperature (and humidity) data from the DWD Open Data
@@ -700,22 +1230,26 @@ def get_nearest_ten_minutes_data(
     :param as_dataframe: Return results as pandas.DataFrame? Defaults to False.
     :param bounds_minutes: Provide range around target date in minutes.
     Defaults to None.
+    :param orient: Layout of the data if not returned as pandas.DataFrame.
+    "records" returns a list with one dict per row, "columnar" a dict with one
+    list per column and the timestamps in ns as "index". Defaults to
+    "records".
     :return: dict
     """
-    ten_minutes_stations = get_ten_minutes_stations(date, lat, lon)
+    ten_minutes_stations = get_ten_minutes_stations(date, lat, lon, top_n=1)
     if len(ten_minutes_stations) == 0:
         logging.warning("no suitable stations found.")
         return None
     station = ten_minutes_stations["stations"][0]
     category = ten_minutes_stations["category"]
     return get_ten_minutes_data(
-        station, category, date, as_dataframe, bounds_minutes
+        station, category, date, as_dataframe, bounds_minutes, orient
     )
 
 
 if __name__ == "__main__":
     hourly_stations = get_hourly_stations(
-        date="20210804T1849", lat=52.52, lon=7.30
+        date="20210804T1849", lat=52.52, lon=7.30, top_n=6
     )
     print(f"hourly ({hourly_stations['category']}):")
     for _station in hourly_stations["stations"][:6]:
@@ -725,7 +1259,10 @@ if __name__ == "__main__":
             f"{_station['temperature_file_name']}"
         )
     data = get_nearest_hourly_data(
-        date="20210804T1849", lat=52.52, lon=7.30, as_dataframe=False
+        date="20210804T1849",
+        lat=52.52,
+        lon=7.30,
+        as_dataframe=False,
     )
     print(f"downloaded nearest hourly data for {data['station']}.")
     print(f"first entry: {data['data'][0]}")
@@ -1,3 +1,4 @@
+import os
 import time
 import logging
 
@@ -5,6 +6,14 @@ logger = logging.getLogger(__name__)
 
 
 def timeit(method):
+    # Timing adds a wrapper call and two clock reads to every call. It is
+    # only applied if the timings would be logged at decoration time or if
+    # BAROALT_PROFILE is set.
+    if not (
+        os.environ.get("BAROALT_PROFILE") or logger.isEnabledFor(logging.INFO)
+    ):
+        return method
+
     def timed(*args, **kw):
         ts = time.time()
         result = method(*args, **kw)